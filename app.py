@@ -9,10 +9,13 @@ Responsibilities:
 """
 
 import logging
+import threading
 import time
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, NamedTuple, Tuple
 
-from flask import Flask, jsonify, render_template
+import orjson
+import redis
+from flask import Flask, Response, render_template
 
 from config import Config
 from price_provider import CoingeckoPriceProvider, PriceProviderError
@@ -45,41 +48,305 @@ price_provider = CoingeckoPriceProvider(
 # ------------------------------------------------------------------------------
 # Simple In-Memory Cache
 # ------------------------------------------------------------------------------
-# This is deliberately minimal: suitable for a single-process demo service.
-# In a production environment, this would likely be Redis or another shared cache.
+# Each process keeps its own copy. When REDIS_URL is set, entries are also
+# published to Redis (see "Shared Cache" below) so gunicorn workers reuse each
+# other's fetches instead of each calling Coingecko once per TTL.
 
-_price_cache: Dict[str, Any] = {
-    "data": None,  # last successful price payload
-    "fetched_at": 0.0,  # unix timestamp of last fetch
-}
 
+class _CacheEntry(NamedTuple):
+    body_template: bytes  # last successful payload, pre-serialized; see `update_cache`
+    fetched_at: float  # time.monotonic() at last fetch
 
-def get_cached_price(allow_stale: bool = False) -> Optional[Dict[str, Any]]:
+
+class CachedPrice(NamedTuple):
+    """What `get_cached_price` hands back to the route."""
+
+    body_template: bytes
+    age_seconds: float
+    stale: bool
+
+
+# The entry is immutable and replaced wholesale by `update_cache`, so readers
+# never see a half-written cache and don't need a lock. It is never evicted:
+# once expired it is still the last known good price for the stale fallback.
+_price_cache: Optional[_CacheEntry] = None
+
+# Held by whichever request is refreshing the cache from the provider, so an
+# expired cache triggers a single upstream call rather than one per request.
+_refresh_lock = threading.Lock()
+
+# Every response opens with the same fixed fields, serialized once here.
+_STATIC_PREFIX = b'{"symbol":"BTC","currency":"USD",'
+
+# Keys that never go into `body_template`: the fixed fields above, and the
+# per-response fields appended to the cached body on every hit.
+_TEMPLATE_EXCLUDED_KEYS = ("symbol", "currency", "stale", "cache_age_seconds")
+
+
+def get_cached_price(allow_stale: bool = False) -> Optional[CachedPrice]:
     """
     Return cached BTC price if it is still within TTL.
 
     If `allow_stale` is True, returns the cached price even when expired so the
     caller can decide whether to serve stale data.
     """
-    ttl = app.config["CACHE_TTL_SECONDS"]
-    now = time.time()
-    if _price_cache["data"] is None:
+    entry = _price_cache
+    if entry is None:
         return None
-    age = now - _price_cache["fetched_at"]
-    is_fresh = age <= ttl
+    age = time.monotonic() - entry.fetched_at
+    is_fresh = age <= app.config["CACHE_TTL_SECONDS"]
     if not is_fresh and not allow_stale:
         return None
+    return CachedPrice(entry.body_template, age, not is_fresh)
+
+
+def update_cache(data: Dict[str, Any]) -> None:
+    """
+    Update the in-memory cache with fresh price data.
+
+    Only the serialized form is kept (`body_template`): `_STATIC_PREFIX`
+    followed by the price fields and a trailing comma. Cache hits only need to
+    serialize stale/cache_age_seconds and concatenate.
+    """
+    _store_local(data, time.monotonic())
+    _publish_shared(data)
+
+
+def _store_local(data: Dict[str, Any], fetched_at: float) -> None:
+    """Install `data` as this process's cache entry."""
+    global _price_cache
+    fields = {k: v for k, v in data.items() if k not in _TEMPLATE_EXCLUDED_KEYS}
+    body_template = _STATIC_PREFIX + orjson.dumps(fields)[1:-1] + b","
+    _price_cache = _CacheEntry(body_template, fetched_at)
+
+
+# ------------------------------------------------------------------------------
+# Shared Cache (optional)
+# ------------------------------------------------------------------------------
+# One Redis key holds the last good payload plus the wall-clock time it was
+# fetched; readers derive freshness from that, so the key only expires once
+# it is too old to be worth serving even as stale. Redis failures are logged
+# and otherwise ignored: the service falls back to per-process caching.
+
+_REDIS_KEY = "btc:usd"
+_REDIS_KEY_TTL_SECONDS = 86400
+_REDIS_TIMEOUT_SECONDS = 0.5
+# Fields a shared entry must carry to be adopted; see `_build_payload`.
+_SHARED_DATA_KEYS = frozenset(
+    ("price", "source", "provider_last_updated", "server_last_updated")
+)
+
+_redis: Optional[redis.Redis] = (
+    redis.Redis.from_url(
+        app.config["REDIS_URL"],
+        socket_timeout=_REDIS_TIMEOUT_SECONDS,
+        socket_connect_timeout=_REDIS_TIMEOUT_SECONDS,
+    )
+    if app.config["REDIS_URL"]
+    else None
+)
+
+
+def _publish_shared(data: Dict[str, Any]) -> None:
+    """Write a freshly fetched payload to Redis for the other workers."""
+    if _redis is None:
+        return
+    value = orjson.dumps({"data": data, "fetched_at": time.time()})
+    try:
+        _redis.set(_REDIS_KEY, value, ex=_REDIS_KEY_TTL_SECONDS)
+    except redis.RedisError as e:
+        logger.warning("Failed to publish BTC price to Redis", extra={"error": str(e)})
+
+
+def _load_shared() -> Optional[float]:
+    """
+    Adopt the Redis entry into the local cache if it is newer than ours.
+
+    Returns the age in seconds of the shared entry, or None when there is no
+    usable one (Redis disabled, empty, unreachable, or holding garbage).
+    """
+    if _redis is None:
+        return None
+    try:
+        raw = _redis.get(_REDIS_KEY)
+        if raw is None:
+            return None
+        shared = orjson.loads(raw)
+        data, fetched_at = shared["data"], shared["fetched_at"]
+        if (
+            not isinstance(fetched_at, (int, float))
+            or not isinstance(data, dict)
+            or not _SHARED_DATA_KEYS <= data.keys()
+        ):
+            raise ValueError(f"Malformed shared cache entry: {raw[:200]!r}")
+        age = time.time() - fetched_at
+    except (redis.RedisError, ValueError, KeyError, TypeError) as e:
+        logger.warning("Failed to read BTC price from Redis", extra={"error": str(e)})
+        return None
+
+    # `fetched_at` came from another host's wall clock; clock skew must not
+    # put our monotonic `fetched_at` in the future.
+    age = max(age, 0.0)
+    entry = _price_cache
+    now = time.monotonic()
+    if entry is None or age < now - entry.fetched_at:
+        _store_local(data, now - age)
+    return age
+
+
+def _build_payload(provider_payload: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Normalize a provider result into the price fields of the API response.
+
+    symbol/currency are constant and come from `_STATIC_PREFIX`;
+    stale/cache_age_seconds are added per response.
+    """
     return {
-        "data": _price_cache["data"],
-        "age_seconds": age,
-        "stale": not is_fresh,
+        "price": provider_payload["price"],
+        "source": provider_payload["source"],
+        "provider_last_updated": provider_payload["provider_last_updated"],
+        # `server_last_updated` is the time we fetched & returned to the client.
+        "server_last_updated": _server_timestamp(),
     }
 
 
-def update_cache(data: Dict[str, Any]) -> None:
-    """Update the in-memory cache with fresh price data."""
-    _price_cache["data"] = data
-    _price_cache["fetched_at"] = time.time()
+# (unix second, formatted) for the most recent `server_last_updated` stamp.
+# Swapped as one tuple so concurrent callers never pair a second with the
+# wrong string.
+_last_server_timestamp: Tuple[int, str] = (-1, "")
+
+
+def _server_timestamp() -> str:
+    """Current UTC time as ISO8601, formatted at most once per second."""
+    global _last_server_timestamp
+    sec = int(time.time())
+    last_sec, formatted = _last_server_timestamp
+    if sec != last_sec:
+        formatted = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(sec))
+        _last_server_timestamp = (sec, formatted)
+    return formatted
+
+
+# ------------------------------------------------------------------------------
+# Background Refresh
+# ------------------------------------------------------------------------------
+# When enabled, a daemon thread keeps the cache warm so requests only read
+# memory. It is started lazily by the first API request, which means each
+# gunicorn worker gets its own thread after forking. A CACHE_TTL_SECONDS of
+# zero or less means "fetch on every request", so no refresher is started.
+
+_REFRESH_BACKOFF_INITIAL_SECONDS = 1.0
+# Lower bound for the refresh interval, so a tiny TTL can't spin the thread.
+_REFRESH_MIN_INTERVAL_SECONDS = 1.0
+
+_refresher: Optional[threading.Thread] = None
+_refresher_start_lock = threading.Lock()
+
+
+def _refresh_cache() -> None:
+    """
+    Fetch a fresh price from the provider and store it in the cache.
+
+    Skipped when another worker published a price to the shared cache within
+    the last refresh interval.
+    """
+    with _refresh_lock:
+        shared_age = _load_shared()
+        if shared_age is not None and shared_age < app.config["CACHE_TTL_SECONDS"] / 2:
+            return
+        update_cache(_build_payload(price_provider.get_btc_usd_price()))
+
+
+def _background_refresh_loop() -> None:
+    """
+    Refresh the cache every `CACHE_TTL_SECONDS / 2` (at least
+    `_REFRESH_MIN_INTERVAL_SECONDS`), forever.
+
+    Failures are retried with exponential backoff (capped at the normal
+    interval); requests keep getting the last good price in the meantime.
+    """
+    interval = max(app.config["CACHE_TTL_SECONDS"] / 2, _REFRESH_MIN_INTERVAL_SECONDS)
+    backoff = _REFRESH_BACKOFF_INITIAL_SECONDS
+    while True:
+        try:
+            _refresh_cache()
+        except Exception as e:
+            delay = min(backoff, interval)
+            backoff *= 2
+            logger.warning(
+                "Background BTC price refresh failed",
+                extra={
+                    "provider": "coingecko",
+                    "error": str(e),
+                    "retry_in_seconds": delay,
+                },
+            )
+        else:
+            delay = interval
+            backoff = _REFRESH_BACKOFF_INITIAL_SECONDS
+        time.sleep(delay)
+
+
+def _start_background_refresh() -> None:
+    """Start the refresher thread once, if enabled in config."""
+    global _refresher
+    if (
+        _refresher is not None
+        or not app.config["BACKGROUND_REFRESH"]
+        or app.config["CACHE_TTL_SECONDS"] <= 0
+    ):
+        return
+    with _refresher_start_lock:
+        if _refresher is None:
+            thread = threading.Thread(
+                target=_background_refresh_loop,
+                name="btc-price-refresher",
+                daemon=True,
+            )
+            thread.start()
+            _refresher = thread
+
+
+# Error bodies are fixed apart from `details`, which `_error_json` appends.
+_UPSTREAM_ERROR_PREFIX = (
+    b'{"error":"Failed to fetch BTC price from upstream provider.","details":'
+)
+_UNEXPECTED_ERROR_PREFIX = b'{"error":"Unexpected error while fetching BTC price.","details":'
+
+
+def _error_json(prefix: bytes, details: str, status: int) -> Response:
+    """Complete one of the pre-serialized error bodies with `details`."""
+    body = prefix + orjson.dumps(details) + b"}"
+    return Response(body, status=status, mimetype="application/json")
+
+
+def _cached_json(body_template: bytes, **fields: Any) -> Response:
+    """
+    Build a response from a cache entry's `body_template`.
+
+    `fields` (stale, cache_age_seconds, ...) are serialized on their own and
+    spliced onto the template, so the cached payload is never re-encoded.
+    """
+    body = body_template + orjson.dumps(fields)[1:]
+    return Response(body, status=200, mimetype="application/json")
+
+
+def _serve_cached(cached: CachedPrice) -> Response:
+    """Return a cache entry from `get_cached_price` as-is (fresh or stale)."""
+    age_seconds = round(cached.age_seconds, 2)
+    # This runs on every cache hit; skip building `extra` unless it's logged.
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(
+            "Serving BTC price from cache",
+            extra={
+                "provider": "coingecko",
+                "cache_age_seconds": age_seconds,
+                "stale": cached.stale,
+            },
+        )
+    return _cached_json(
+        cached.body_template, stale=cached.stale, cache_age_seconds=age_seconds
+    )
 
 
 # ------------------------------------------------------------------------------
@@ -103,62 +370,60 @@ def get_btc_price():
     JSON API: Return the current BTC price in USD.
 
     This is the primary API consumed by the frontend. It:
-    - Checks a small in-memory cache.
-    - If stale/missing, calls the external provider (Coingecko).
+    - Checks a small in-memory cache, kept warm by the background refresher
+      when that is enabled.
+    - If stale/missing, calls the external provider (Coingecko), letting only
+      one request at a time do so.
     - Normalizes the response into a consistent JSON shape.
     - Returns appropriate HTTP status codes on error.
     """
-    # 1. Check cache first to avoid unnecessary external calls.
-    cached = get_cached_price()
+    _start_background_refresh()
+
+    # 1. Check cache first to avoid unnecessary external calls. While the
+    #    background refresher owns refreshing, any cached entry is served and
+    #    we only fall through to fetching on a cold cache.
+    cached = get_cached_price(allow_stale=_refresher is not None)
     if cached:
-        payload = {
-            **cached["data"],
-            "stale": cached["stale"],
-            "cache_age_seconds": round(cached["age_seconds"], 2),
-        }
-        logger.debug(
-            "Serving BTC price from cache",
-            extra={
-                "provider": "coingecko",
-                "cache_age_seconds": cached["age_seconds"],
-                "stale": cached["stale"],
-            },
-        )
-        return jsonify(payload), 200
+        return _serve_cached(cached)
+
+    # 2. Only one request refreshes at a time. Others serve the expired entry
+    #    if there is one, or wait for the in-flight fetch on a cold cache.
+    if not _refresh_lock.acquire(blocking=False):
+        stale_cached = get_cached_price(allow_stale=True)
+        if stale_cached:
+            return _serve_cached(stale_cached)
+        _refresh_lock.acquire()
+        cached = get_cached_price()
+        if cached:
+            _refresh_lock.release()
+            return _serve_cached(cached)
 
-    # 2. Fetch from external provider if cache empty/expired.
+    # 3. Fetch from external provider if cache empty/expired, unless another
+    #    worker has already put a fresh price in the shared cache.
     try:
-        start = time.time()
+        cached = get_cached_price() if _load_shared() is not None else None
+        if cached:
+            return _serve_cached(cached)
+
+        start_ns = time.perf_counter_ns()
         provider_payload = price_provider.get_btc_usd_price()
-        duration_ms = round((time.time() - start) * 1000, 2)
-
-        logger.info(
-            "Fetched BTC price from provider",
-            extra={
-                "provider": "coingecko",
-                "latency_ms": duration_ms,
-                "status": "success",
-            },
-        )
-
-        # 3. Normalize into final JSON shape consumed by frontend.
-        response_payload = {
-            "symbol": "BTC",
-            "currency": "USD",
-            "price": provider_payload["price"],
-            "source": provider_payload["source"],
-            "provider_last_updated": provider_payload["provider_last_updated"],
-            # `server_last_updated` is the time we fetched & returned to the client.
-            "server_last_updated": time.strftime(
-                "%Y-%m-%dT%H:%M:%SZ", time.gmtime()
-            ),
-            "stale": False,
-            "cache_age_seconds": 0.0,
-        }
-
-        # 4. Update cache and return.
-        update_cache(response_payload)
-        return jsonify(response_payload), 200
+        duration_ms = (time.perf_counter_ns() - start_ns) // 1_000_000
+
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(
+                "Fetched BTC price from provider",
+                extra={
+                    "provider": "coingecko",
+                    "latency_ms": duration_ms,
+                    "status": "success",
+                },
+            )
+
+        # 4. Normalize, update cache, and answer from the new cache entry.
+        update_cache(_build_payload(provider_payload))
+        return _cached_json(
+            _price_cache.body_template, stale=False, cache_age_seconds=0.0
+        )
 
     except PriceProviderError as e:
         # Known provider-level error (e.g., bad response, JSON parse failure).
@@ -174,49 +439,41 @@ def get_btc_price():
         # Serve stale cache if available to avoid a hard failure.
         stale_cached = get_cached_price(allow_stale=True)
         if stale_cached:
-            payload = {
-                **stale_cached["data"],
-                "stale": True,
-                "cache_age_seconds": round(stale_cached["age_seconds"], 2),
-                "warning": "Using stale cached price due to upstream error.",
-            }
             logger.warning(
                 "Serving stale cached BTC price after provider failure",
                 extra={
                     "provider": "coingecko",
-                    "cache_age_seconds": stale_cached["age_seconds"],
+                    "cache_age_seconds": stale_cached.age_seconds,
                     "error": str(e),
                 },
             )
-            return jsonify(payload), 200
-
-        return (
-            jsonify(
-                {
-                    "error": "Failed to fetch BTC price from upstream provider.",
-                    "details": str(e),
-                }
-            ),
-            502,
-        )
+            return _cached_json(
+                stale_cached.body_template,
+                stale=True,
+                cache_age_seconds=round(stale_cached.age_seconds, 2),
+                warning="Using stale cached price due to upstream error.",
+            )
+
+        return _error_json(_UPSTREAM_ERROR_PREFIX, str(e), 502)
 
     except Exception as e:
         # Catch-all for unexpected errors. In a real system, this might trigger
         # an alert or Sentry event.
         logger.exception("Unexpected error while fetching BTC price")
-        return (
-            jsonify(
-                {
-                    "error": "Unexpected error while fetching BTC price.",
-                    "details": str(e),
-                }
-            ),
-            500,
-        )
+        return _error_json(_UNEXPECTED_ERROR_PREFIX, str(e), 500)
+
+    finally:
+        _refresh_lock.release()
+
+
+# Liveness probes hit this constantly and the answer never changes, so the
+# same Response object is returned every time.
+_HEALTH_RESPONSE = Response(b'{"status":"ok"}', status=200, mimetype="application/json")
+
 
 @app.route("/health", methods=["GET"])
 def health():
-    return {"status": "ok"}, 200
+    return _HEALTH_RESPONSE
 
 
 # ------------------------------------------------------------------------------
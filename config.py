@@ -32,3 +32,11 @@ class Config:
     # If many users request the price frequently, this prevents excessive
     # calls to the upstream API.
     CACHE_TTL_SECONDS = int(os.getenv("CACHE_TTL_SECONDS", "120"))
+
+    # Refresh the cache from a background thread every CACHE_TTL_SECONDS / 2
+    # so API requests don't wait on the upstream call.
+    BACKGROUND_REFRESH = os.getenv("BACKGROUND_REFRESH", "true").lower() == "true"
+
+    # Optional Redis URL (e.g. redis://localhost:6379/0). When set, the price
+    # cache is shared between worker processes through Redis.
+    REDIS_URL = os.getenv("REDIS_URL")
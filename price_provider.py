@@ -16,20 +16,44 @@ from __future__ import annotations
 
 import logging
 import time
-from dataclasses import dataclass
-from datetime import datetime, timezone
-from typing import Dict, Any
+from dataclasses import dataclass, field
+from typing import Dict, Any, Optional, Tuple
+from urllib.parse import urlencode
 
+import msgspec
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 logger = logging.getLogger(__name__)
 
+# Same shape as datetime.isoformat() for a whole-second UTC datetime.
+_ISO8601_UTC = "%Y-%m-%dT%H:%M:%S+00:00"
+
 
 class PriceProviderError(Exception):
     """Raised when the external price provider fails or returns invalid data."""
 
 
-@dataclass
+class _Retry(Retry):
+    """
+    urllib3 Retry that also backs off before the first retry.
+
+    Stock urllib3 2.x retries the first failure immediately and only then
+    sleeps backoff_factor * 2 ** (n - 1). We want factor, 2 * factor, ...
+
+    Relies on urllib3 2.x internals (`backoff_max`, the zero first backoff),
+    hence the urllib3>=2 pin in requirements.txt.
+    """
+
+    def get_backoff_time(self) -> float:
+        backoff = super().get_backoff_time()
+        if not backoff and self.history:
+            return min(self.backoff_factor, self.backoff_max)
+        return backoff
+
+
+@dataclass(slots=True)
 class CoingeckoPriceProvider:
     """
     Simple wrapper around Coingecko's "simple price" API.
@@ -44,11 +68,63 @@ class CoingeckoPriceProvider:
     timeout_seconds: float = 3.0
     retry_attempts: int = 2
     retry_backoff_seconds: float = 0.3
+    _session: requests.Session = field(init=False, repr=False, compare=False)
+    # Fully encoded request URL per (ids, vs_currencies); see `_url_for`.
+    _urls: Dict[Tuple[Tuple[str, ...], Tuple[str, ...]], str] = field(
+        init=False, repr=False, compare=False
+    )
+
+    def __post_init__(self) -> None:
+        # One long-lived session so refreshes reuse the pooled keep-alive
+        # connection instead of paying a TCP + TLS handshake every time.
+        # urllib3 retries connection errors and 5xx responses, waiting
+        # `retry_backoff_seconds` before the first retry and doubling after
+        # that; `retry_attempts` counts the first attempt too. Retry-After is
+        # ignored: refreshes run under the app's refresh lock, so an upstream
+        # asking us to wait minutes would stall every waiting request.
+        retry = _Retry(
+            total=max(self.retry_attempts - 1, 0),
+            backoff_factor=self.retry_backoff_seconds,
+            status_forcelist=(500, 502, 503, 504),
+            allowed_methods={"GET"},
+            raise_on_status=False,
+            respect_retry_after_header=False,
+        )
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=4, max_retries=retry)
+        self._session.mount("https://", adapter)
+        self._session.mount("http://", adapter)
+
+        self._urls = {}
+        self._url_for(("bitcoin",), ("usd",))
+
+    def _url_for(self, ids: Tuple[str, ...], vs_currencies: Tuple[str, ...]) -> str:
+        """
+        Return the simple/price URL for `ids` x `vs_currencies`.
+
+        The query string is encoded once per combination and reused, instead
+        of having requests rebuild and encode a params dict on every call.
+        """
+        key = (ids, vs_currencies)
+        url = self._urls.get(key)
+        if url is None:
+            query = urlencode(
+                {
+                    "ids": ",".join(ids),
+                    "vs_currencies": ",".join(vs_currencies),
+                    "include_last_updated_at": "true",
+                },
+                safe=",",
+            )
+            url = self._urls[key] = f"{self.base_url}?{query}"
+        return url
 
     def get_btc_usd_price(self) -> Dict[str, Any]:
         """
         Fetch the current BTC price in USD from Coingecko.
 
+        Thin adapter over `get_prices` that normalizes the BTC/USD quote.
+
         Returns:
             dict with fields:
                 - price: float
@@ -58,92 +134,107 @@ class CoingeckoPriceProvider:
         Raises:
             PriceProviderError on any error (network, HTTP, JSON, schema).
         """
-        params = {
-            "ids": "bitcoin",
-            "vs_currencies": "usd",
-            "include_last_updated_at": "true",
-        }
+        bitcoin = self.get_prices(("bitcoin",), ("usd",))["bitcoin"]
+        price = bitcoin["usd"]
 
-        last_error: Exception | None = None
+        # If the timestamp is missing or null, gmtime(None) gives the current
+        # time, so we still emit *something* consistent.
+        provider_last_updated = time.strftime(
+            _ISO8601_UTC, time.gmtime(bitcoin["last_updated_at"])
+        )
 
-        for attempt in range(1, self.retry_attempts + 1):
-            response = None
-            try:
-                response = requests.get(
-                    self.base_url, params=params, timeout=self.timeout_seconds
-                )
-            except requests.RequestException as e:
-                last_error = PriceProviderError(
-                    f"Network error calling Coingecko: {e}"
-                )
-            else:
-                status_code = response.status_code
-                if status_code != 200:
-                    # Include a short preview of the body for diagnostics.
-                    preview = ""
-                    try:
-                        preview = response.text[:200]
-                    except Exception:
-                        preview = "<unavailable>"
-
-                    last_error = PriceProviderError(
-                        f"Coingecko returned status {status_code}: {preview}"
-                    )
-                else:
-                    try:
-                        data = response.json()
-                    except ValueError as e:
-                        last_error = PriceProviderError(
-                            "Failed to parse JSON from Coingecko"
-                        )
-                    else:
-                        try:
-                            bitcoin = data["bitcoin"]
-                            price = float(bitcoin["usd"])
-                        except (KeyError, TypeError, ValueError):
-                            last_error = PriceProviderError(
-                                f"Unexpected Coingecko response structure: {data}"
-                            )
-                        else:
-                            ts = bitcoin.get("last_updated_at")
-                            if isinstance(ts, (int, float)):
-                                provider_last_updated = datetime.fromtimestamp(
-                                    ts, tz=timezone.utc
-                                ).isoformat()
-                            else:
-                                # If not present, we still emit *something* consistent.
-                                provider_last_updated = datetime.now(
-                                    tz=timezone.utc
-                                ).isoformat()
-
-                            logger.debug(
-                                "Parsed Coingecko response",
-                                extra={
-                                    "price": price,
-                                    "provider_last_updated": provider_last_updated,
-                                    "attempt": attempt,
-                                },
-                            )
-
-                            return {
-                                "price": price,
-                                "source": "coingecko",
-                                "provider_last_updated": provider_last_updated,
-                            }
-
-            # If we reach here, attempt failed.
-            logger.warning(
-                "Coingecko request attempt failed",
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "Parsed Coingecko response",
                 extra={
-                    "attempt": attempt,
-                    "max_attempts": self.retry_attempts,
-                    "error": str(last_error),
-                    "status_code": getattr(response, "status_code", None),
+                    "price": price,
+                    "provider_last_updated": provider_last_updated,
                 },
             )
 
-            if attempt < self.retry_attempts:
-                time.sleep(self.retry_backoff_seconds)
+        return {
+            "price": price,
+            "source": "coingecko",
+            "provider_last_updated": provider_last_updated,
+        }
+
+    def get_prices(
+        self, ids: Tuple[str, ...], vs_currencies: Tuple[str, ...]
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Fetch prices for several coins and currencies in one Coingecko call.
+
+        Coingecko accepts up to 100 ids per request, so new symbols should be
+        added to a batch here rather than fetched one request each.
+
+        Args:
+            ids: Coingecko coin ids, e.g. ("bitcoin", "ethereum").
+            vs_currencies: quote currencies, e.g. ("usd", "eur").
+
+        Returns:
+            dict keyed by coin id; each value maps every requested currency to
+            its price (float), plus `last_updated_at` (unix seconds or None).
+
+        Raises:
+            PriceProviderError on any error (network, HTTP, JSON, schema).
+        """
+        url = self._url_for(ids, vs_currencies)
+
+        # Retries and backoff happen inside the session's adapter, so by the
+        # time we get here the final attempt has already been made.
+        try:
+            response = self._session.get(url, timeout=self.timeout_seconds)
+        except requests.RequestException as e:
+            raise PriceProviderError(f"Network error calling Coingecko: {e}") from e
+
+        status_code = response.status_code
+        if status_code != 200:
+            # Include a short preview of the body for diagnostics.
+            preview = ""
+            try:
+                preview = response.text[:200]
+            except Exception:
+                preview = "<unavailable>"
+
+            raise PriceProviderError(
+                f"Coingecko returned status {status_code}: {preview}"
+            )
+
+        try:
+            data = _simple_price_decoder.decode(response.content)
+        except msgspec.ValidationError as e:
+            raise PriceProviderError(
+                f"Unexpected Coingecko response structure: {e}"
+            ) from e
+        except msgspec.DecodeError as e:
+            raise PriceProviderError("Failed to parse JSON from Coingecko") from e
+
+        try:
+            return {
+                coin_id: _parse_quote(data[coin_id], vs_currencies) for coin_id in ids
+            }
+        except (KeyError, ValueError) as e:
+            raise PriceProviderError(
+                f"Unexpected Coingecko response structure: {data}"
+            ) from e
+
+
+# simple/price responses are {coin_id: {currency: price, "last_updated_at": ts}}.
+# Decoding against this type parses and checks every value is a number or null
+# in one pass. Coingecko may send a null timestamp, so nulls are allowed here
+# and `_parse_quote` rejects them for the requested prices only.
+_simple_price_decoder = msgspec.json.Decoder(Dict[str, Dict[str, Optional[float]]])
+
 
-        # Exhausted retries.
-        raise last_error or PriceProviderError("Unknown error calling Coingecko")
+def _parse_quote(
+    quote: Dict[str, Optional[float]], vs_currencies: Tuple[str, ...]
+) -> Dict[str, Any]:
+    """Pick the requested currencies out of one coin's decoded entry."""
+    parsed: Dict[str, Any] = {}
+    for cur in vs_currencies:
+        price = quote[cur]
+        if price is None:
+            raise ValueError(f"null {cur} price")
+        parsed[cur] = price
+    parsed["last_updated_at"] = quote.get("last_updated_at")
+    return parsed
@@ -6,18 +6,24 @@ calls and to control caching behaviour.
 """
 
 import time as std_time
+from types import SimpleNamespace
 
+import orjson
 import pytest
+import redis
 
 import app as btc_app
 from price_provider import PriceProviderError
 
+# Keep a handle on the real gmtime: `btc_app.time` *is* the stdlib module, so
+# once `set_time` patches it, `std_time.gmtime` would resolve to the patch.
+_real_gmtime = std_time.gmtime
+
 
 @pytest.fixture(autouse=True)
 def reset_cache():
-    btc_app._price_cache["data"] = None
-    btc_app._price_cache["fetched_at"] = 0.0
-    btc_app.app.config.update(TESTING=True)
+    btc_app._price_cache = None
+    btc_app.app.config.update(TESTING=True, BACKGROUND_REFRESH=False)
     yield
 
 
@@ -26,52 +32,70 @@ def client():
     return btc_app.app.test_client()
 
 
+@pytest.fixture
+def stub_provider(monkeypatch):
+    """Swap in a provider whose get_btc_usd_price is the given callable."""
+
+    def _stub(get_btc_usd_price):
+        monkeypatch.setattr(
+            btc_app,
+            "price_provider",
+            SimpleNamespace(get_btc_usd_price=get_btc_usd_price),
+        )
+
+    return _stub
+
+
 @pytest.fixture
 def set_time(monkeypatch):
     def _set(value: float):
         monkeypatch.setattr(btc_app.time, "time", lambda: value)
+        monkeypatch.setattr(btc_app.time, "monotonic", lambda: value)
         monkeypatch.setattr(
             btc_app.time,
             "gmtime",
-            lambda ts=None: std_time.gmtime(value if ts is None else ts),
+            lambda ts=None: _real_gmtime(value if ts is None else ts),
         )
 
     return _set
 
 
-def test_api_success(monkeypatch, client, set_time):
+def test_api_success(client, set_time, stub_provider):
     sample = {
         "price": 50000.12,
         "source": "coingecko",
         "provider_last_updated": "2023-01-01T00:00:00Z",
     }
 
-    monkeypatch.setattr(btc_app.price_provider, "get_btc_usd_price", lambda: sample)
+    stub_provider(lambda: sample)
     set_time(1700000000.0)
 
     resp = client.get("/api/prices/btc-usd")
     assert resp.status_code == 200
     data = resp.get_json()
 
+    assert data["symbol"] == "BTC"
+    assert data["currency"] == "USD"
     assert data["price"] == sample["price"]
     assert data["source"] == "coingecko"
     assert data["stale"] is False
 
 
-def test_api_provider_failure_returns_502(monkeypatch, client, set_time):
+def test_api_provider_failure_returns_502(client, set_time, stub_provider):
     def failing():
         raise PriceProviderError("coingecko down")
 
-    monkeypatch.setattr(btc_app.price_provider, "get_btc_usd_price", failing)
+    stub_provider(failing)
     set_time(1700000100.0)
 
     resp = client.get("/api/prices/btc-usd")
     assert resp.status_code == 502
     data = resp.get_json()
     assert "error" in data
+    assert data["details"] == "coingecko down"
 
 
-def test_cached_response_reused_within_ttl(monkeypatch, client, set_time):
+def test_cached_response_reused_within_ttl(client, set_time, stub_provider):
     call_count = {"value": 0}
 
     def fake_get():
@@ -82,7 +106,7 @@ def test_cached_response_reused_within_ttl(monkeypatch, client, set_time):
             "provider_last_updated": "2023-01-01T00:00:00Z",
         }
 
-    monkeypatch.setattr(btc_app.price_provider, "get_btc_usd_price", fake_get)
+    stub_provider(fake_get)
 
     now = [1_700_000_000.0]
 
@@ -105,7 +129,7 @@ def test_cached_response_reused_within_ttl(monkeypatch, client, set_time):
     assert data2["cache_age_seconds"] >= 30
 
 
-def test_stale_cache_fallback(monkeypatch, client, set_time):
+def test_stale_cache_fallback(client, set_time, stub_provider):
     cached_payload = {
         "symbol": "BTC",
         "currency": "USD",
@@ -127,7 +151,7 @@ def test_stale_cache_fallback(monkeypatch, client, set_time):
     def failing():
         raise PriceProviderError("coingecko unreachable")
 
-    monkeypatch.setattr(btc_app.price_provider, "get_btc_usd_price", failing)
+    stub_provider(failing)
 
     resp = client.get("/api/prices/btc-usd")
     data = resp.get_json()
@@ -137,3 +161,267 @@ def test_stale_cache_fallback(monkeypatch, client, set_time):
     assert data["stale"] is True
     assert "warning" in data
     assert data["cache_age_seconds"] > btc_app.app.config["CACHE_TTL_SECONDS"]
+
+
+def test_concurrent_refresh_serves_stale_cache(client, set_time, stub_provider):
+    cached_payload = {
+        "symbol": "BTC",
+        "currency": "USD",
+        "price": 49000.0,
+        "source": "coingecko",
+        "provider_last_updated": "2023-01-01T00:00:00Z",
+        "server_last_updated": "2023-01-01T00:00:00Z",
+    }
+
+    set_time(0.0)
+    btc_app.update_cache(cached_payload)
+    set_time(btc_app.app.config["CACHE_TTL_SECONDS"] + 10)
+
+    def unexpected():
+        raise AssertionError("provider should not be called during a refresh")
+
+    stub_provider(unexpected)
+
+    # Simulate another request holding the refresh lock.
+    btc_app._refresh_lock.acquire()
+    try:
+        resp = client.get("/api/prices/btc-usd")
+    finally:
+        btc_app._refresh_lock.release()
+
+    data = resp.get_json()
+    assert resp.status_code == 200
+    assert data["price"] == cached_payload["price"]
+    assert data["stale"] is True
+
+
+def test_background_refresher_keeps_request_path_off_provider(
+    monkeypatch, client, set_time, stub_provider
+):
+    sample = {
+        "price": 52000.0,
+        "source": "coingecko",
+        "provider_last_updated": "2023-01-01T00:00:00Z",
+    }
+    stub_provider(lambda: sample)
+
+    # What the refresher thread does on each tick.
+    set_time(0.0)
+    btc_app._refresh_cache()
+
+    def unexpected():
+        raise AssertionError("request path should not call the provider")
+
+    stub_provider(unexpected)
+    # Pretend the refresher thread is running, and let the entry expire.
+    monkeypatch.setattr(btc_app, "_refresher", object())
+    set_time(btc_app.app.config["CACHE_TTL_SECONDS"] + 10)
+
+    resp = client.get("/api/prices/btc-usd")
+    data = resp.get_json()
+    assert resp.status_code == 200
+    assert data["price"] == sample["price"]
+    assert data["stale"] is True
+
+
+class FakeRedis:
+    """Just enough of redis.Redis for the shared cache."""
+
+    def __init__(self):
+        self.store = {}
+
+    def get(self, key):
+        return self.store.get(key)
+
+    def set(self, key, value, ex=None):
+        self.store[key] = value
+
+
+def test_shared_cache_reused_across_workers(monkeypatch, client, set_time, stub_provider):
+    shared = FakeRedis()
+    monkeypatch.setattr(btc_app, "_redis", shared)
+    stub_provider(
+        lambda: {
+            "price": 53000.0,
+            "source": "coingecko",
+            "provider_last_updated": "2023-01-01T00:00:00Z",
+        }
+    )
+
+    set_time(1_700_000_000.0)
+    assert client.get("/api/prices/btc-usd").status_code == 200
+    assert btc_app._REDIS_KEY in shared.store
+
+    # A second worker starts with an empty local cache.
+    btc_app._price_cache = None
+
+    def unexpected():
+        raise AssertionError("provider should not be called when Redis is fresh")
+
+    stub_provider(unexpected)
+    set_time(1_700_000_030.0)
+
+    resp = client.get("/api/prices/btc-usd")
+    data = resp.get_json()
+    assert resp.status_code == 200
+    assert data["price"] == 53000.0
+    assert data["stale"] is False
+    assert data["cache_age_seconds"] >= 30
+
+
+def test_health(client):
+    for _ in range(2):
+        resp = client.get("/health")
+        assert resp.status_code == 200
+        assert resp.get_json() == {"status": "ok"}
+
+
+def test_shared_cache_from_skewed_clock_has_no_negative_age(monkeypatch, client, set_time):
+    shared = FakeRedis()
+    shared.store[btc_app._REDIS_KEY] = orjson.dumps(
+        {
+            "data": {
+                "price": 54000.0,
+                "source": "coingecko",
+                "provider_last_updated": "2023-01-01T00:00:00Z",
+                "server_last_updated": "2023-01-01T00:00:00Z",
+            },
+            # Written by a worker whose clock runs 60s ahead of ours.
+            "fetched_at": 1_700_000_060.0,
+        }
+    )
+    monkeypatch.setattr(btc_app, "_redis", shared)
+    set_time(1_700_000_000.0)
+
+    resp = client.get("/api/prices/btc-usd")
+
+    data = resp.get_json()
+    assert resp.status_code == 200
+    assert data["price"] == 54000.0
+    assert data["cache_age_seconds"] == 0.0
+
+
+class BrokenRedis:
+    """A Redis client whose server is unreachable."""
+
+    def get(self, key):
+        raise redis.ConnectionError("connection refused")
+
+    def set(self, key, value, ex=None):
+        raise redis.ConnectionError("connection refused")
+
+
+def test_redis_outage_falls_back_to_provider(monkeypatch, client, set_time, stub_provider):
+    monkeypatch.setattr(btc_app, "_redis", BrokenRedis())
+    stub_provider(
+        lambda: {
+            "price": 55000.0,
+            "source": "coingecko",
+            "provider_last_updated": "2023-01-01T00:00:00Z",
+        }
+    )
+    set_time(1_700_000_000.0)
+
+    resp = client.get("/api/prices/btc-usd")
+    data = resp.get_json()
+    assert resp.status_code == 200
+    assert data["price"] == 55000.0
+    assert data["stale"] is False
+
+    # The in-process cache still works while Redis is down.
+    set_time(1_700_000_030.0)
+    assert client.get("/api/prices/btc-usd").get_json()["cache_age_seconds"] >= 30
+
+
+def test_background_refresh_loop_backs_off_then_resets(monkeypatch):
+    outcomes = iter([PriceProviderError("down"), PriceProviderError("down"), None])
+    delays = []
+
+    class StopLoop(Exception):
+        pass
+
+    def fake_refresh():
+        outcome = next(outcomes)
+        if outcome is not None:
+            raise outcome
+
+    def fake_sleep(seconds):
+        delays.append(seconds)
+        if len(delays) == 3:
+            raise StopLoop
+
+    monkeypatch.setattr(btc_app, "_refresh_cache", fake_refresh)
+    monkeypatch.setattr(btc_app.time, "sleep", fake_sleep)
+
+    with pytest.raises(StopLoop):
+        btc_app._background_refresh_loop()
+
+    interval = btc_app.app.config["CACHE_TTL_SECONDS"] / 2
+    assert delays == [1.0, 2.0, interval]
+
+
+def test_background_refresh_disabled_and_floored_for_zero_ttl(monkeypatch):
+    monkeypatch.setitem(btc_app.app.config, "BACKGROUND_REFRESH", True)
+    monkeypatch.setitem(btc_app.app.config, "CACHE_TTL_SECONDS", 0)
+
+    # TTL=0 means "fetch on every request": no refresher thread.
+    btc_app._start_background_refresh()
+    assert btc_app._refresher is None
+
+    # Even if the loop runs with it, neither success nor failure spins.
+    outcomes = iter([PriceProviderError("rate limited"), None])
+    delays = []
+
+    class StopLoop(Exception):
+        pass
+
+    def fake_refresh():
+        outcome = next(outcomes)
+        if outcome is not None:
+            raise outcome
+
+    def fake_sleep(seconds):
+        delays.append(seconds)
+        if len(delays) == 2:
+            raise StopLoop
+
+    monkeypatch.setattr(btc_app, "_refresh_cache", fake_refresh)
+    monkeypatch.setattr(btc_app.time, "sleep", fake_sleep)
+
+    with pytest.raises(StopLoop):
+        btc_app._background_refresh_loop()
+
+    assert delays == [1.0, 1.0]
+
+
+@pytest.mark.parametrize(
+    "stored",
+    [
+        {"data": {}, "fetched_at": 1_700_000_000.0},
+        {"data": [1], "fetched_at": 1_700_000_000.0},
+        {"data": {"price": 1.0}, "fetched_at": "yesterday"},
+        [1, 2, 3],
+    ],
+)
+def test_malformed_shared_entry_falls_back_to_provider(
+    monkeypatch, client, set_time, stub_provider, stored
+):
+    shared = FakeRedis()
+    shared.store[btc_app._REDIS_KEY] = orjson.dumps(stored)
+    monkeypatch.setattr(btc_app, "_redis", shared)
+    stub_provider(
+        lambda: {
+            "price": 56000.0,
+            "source": "coingecko",
+            "provider_last_updated": "2023-01-01T00:00:00Z",
+        }
+    )
+    set_time(1_700_000_000.0)
+
+    resp = client.get("/api/prices/btc-usd")
+    data = resp.get_json()
+    assert resp.status_code == 200
+    assert data["price"] == 56000.0
+    assert data["symbol"] == "BTC"
+    # The fresh fetch replaces the bad key for the other workers.
+    assert orjson.loads(shared.store[btc_app._REDIS_KEY])["data"]["price"] == 56000.0
@@ -5,8 +5,17 @@ In a real project, this would be run via:
     pytest tests/
 """
 
+import http.server
+import threading
+import time
+
+import orjson
+
+import price_provider as pp
 from price_provider import CoingeckoPriceProvider, PriceProviderError
 
+_real_gmtime = time.gmtime
+
 
 def test_provider_smoke(monkeypatch):
     """
@@ -24,28 +33,24 @@ def test_provider_smoke(monkeypatch):
 
     class DummyResponse:
         status_code = 200
-
-        def json(self):
-            return sample_json
+        content = orjson.dumps(sample_json)
 
     def fake_get(url, params=None, timeout=None):
         return DummyResponse()
 
-    # Patch requests.get inside the provider module.
-    import price_provider as pp
-
-    monkeypatch.setattr(pp.requests, "get", fake_get)
-
     provider = CoingeckoPriceProvider(
         base_url="https://dummy-url.example",
         retry_attempts=1,
         retry_backoff_seconds=0,
     )
+    # Patch the provider's HTTP session so no real request is made.
+    monkeypatch.setattr(provider._session, "get", fake_get)
+
     result = provider.get_btc_usd_price()
 
     assert result["price"] == sample_json["bitcoin"]["usd"]
     assert result["source"] == "coingecko"
-    assert "provider_last_updated" in result
+    assert result["provider_last_updated"] == "2023-11-14T22:13:20+00:00"
 
 
 def test_provider_bad_status(monkeypatch):
@@ -60,14 +65,35 @@ def test_provider_bad_status(monkeypatch):
     def fake_get(url, params=None, timeout=None):
         return DummyResponse()
 
-    import price_provider as pp
+    provider = CoingeckoPriceProvider(
+        base_url="https://dummy-url.example",
+        retry_attempts=1,
+        retry_backoff_seconds=0,
+    )
+    monkeypatch.setattr(provider._session, "get", fake_get)
 
-    monkeypatch.setattr(pp.requests, "get", fake_get)
+    try:
+        provider.get_btc_usd_price()
+    except PriceProviderError:
+        assert True
+    else:
+        assert False, "Expected PriceProviderError to be raised"
+
+
+def test_provider_invalid_json(monkeypatch):
+    """Provider should raise PriceProviderError when the body is not JSON."""
+
+    class DummyResponse:
+        status_code = 200
+        content = b"<html>rate limited</html>"
 
     provider = CoingeckoPriceProvider(
         base_url="https://dummy-url.example",
         retry_attempts=1,
         retry_backoff_seconds=0,
+    )
+    monkeypatch.setattr(
+        provider._session, "get", lambda url, params=None, timeout=None: DummyResponse()
     )
 
     try:
@@ -76,3 +102,147 @@ def test_provider_bad_status(monkeypatch):
         assert True
     else:
         assert False, "Expected PriceProviderError to be raised"
+
+
+def test_provider_get_prices_batches_ids(monkeypatch):
+    """get_prices should request every id/currency in a single call."""
+
+    sample_json = {
+        "bitcoin": {"usd": 67321.12, "eur": 62000.5, "last_updated_at": 1700000000},
+        "ethereum": {"usd": 3500, "eur": 3200.25},
+    }
+    calls = []
+
+    class DummyResponse:
+        status_code = 200
+        content = orjson.dumps(sample_json)
+
+    def fake_get(url, params=None, timeout=None):
+        calls.append(url)
+        return DummyResponse()
+
+    provider = CoingeckoPriceProvider(
+        base_url="https://dummy-url.example",
+        retry_attempts=1,
+        retry_backoff_seconds=0,
+    )
+    monkeypatch.setattr(provider._session, "get", fake_get)
+
+    prices = provider.get_prices(("bitcoin", "ethereum"), ("usd", "eur"))
+
+    assert len(calls) == 1
+    assert calls[0] == (
+        "https://dummy-url.example"
+        "?ids=bitcoin,ethereum&vs_currencies=usd,eur&include_last_updated_at=true"
+    )
+    assert prices["bitcoin"]["eur"] == 62000.5
+    assert prices["ethereum"]["usd"] == 3500.0
+    assert prices["ethereum"]["last_updated_at"] is None
+
+
+def test_provider_rejects_non_numeric_price(monkeypatch):
+    """A null/non-numeric price should fail validation, not reach callers."""
+
+    class DummyResponse:
+        status_code = 200
+        content = b'{"bitcoin": {"usd": null, "last_updated_at": 1700000000}}'
+
+    provider = CoingeckoPriceProvider(
+        base_url="https://dummy-url.example",
+        retry_attempts=1,
+        retry_backoff_seconds=0,
+    )
+    monkeypatch.setattr(
+        provider._session, "get", lambda url, params=None, timeout=None: DummyResponse()
+    )
+
+    try:
+        provider.get_btc_usd_price()
+    except PriceProviderError:
+        assert True
+    else:
+        assert False, "Expected PriceProviderError to be raised"
+
+
+def test_provider_null_timestamp_uses_current_time(monkeypatch):
+    """A null last_updated_at falls back to now instead of failing."""
+
+    class DummyResponse:
+        status_code = 200
+        content = b'{"bitcoin": {"usd": 67321.12, "last_updated_at": null}}'
+
+    provider = CoingeckoPriceProvider(
+        base_url="https://dummy-url.example",
+        retry_attempts=1,
+        retry_backoff_seconds=0,
+    )
+    monkeypatch.setattr(
+        provider._session, "get", lambda url, params=None, timeout=None: DummyResponse()
+    )
+    monkeypatch.setattr(
+        pp.time, "gmtime", lambda ts=None: _real_gmtime(1700000000 if ts is None else ts)
+    )
+
+    result = provider.get_btc_usd_price()
+
+    assert result["price"] == 67321.12
+    assert result["provider_last_updated"] == "2023-11-14T22:13:20+00:00"
+
+
+def test_provider_retries_configured_on_session():
+    """retry_attempts counts the first attempt; urllib3 handles the rest."""
+
+    provider = CoingeckoPriceProvider(
+        base_url="https://dummy-url.example",
+        retry_attempts=3,
+        retry_backoff_seconds=0.5,
+    )
+    retry = provider._session.get_adapter("https://dummy-url.example").max_retries
+
+    assert retry.total == 2
+    assert retry.backoff_factor == 0.5
+    assert 503 in retry.status_forcelist
+
+
+def test_provider_retries_5xx_with_backoff():
+    """A 503 is retried after retry_backoff_seconds; Retry-After is ignored."""
+
+    hits = []
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self):
+            hits.append(self.path)
+            if len(hits) == 1:
+                self.send_response(503)
+                self.send_header("Retry-After", "5")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            body = b'{"bitcoin": {"usd": 67321.12, "last_updated_at": 1700000000}}'
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = http.server.HTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        provider = CoingeckoPriceProvider(
+            base_url=f"http://127.0.0.1:{server.server_port}/simple/price",
+            timeout_seconds=1,
+            retry_attempts=2,
+            retry_backoff_seconds=0.2,
+        )
+        start = time.monotonic()
+        result = provider.get_btc_usd_price()
+        elapsed = time.monotonic() - start
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert result["price"] == 67321.12
+    assert len(hits) == 2
+    assert 0.2 <= elapsed < 2